@@ -0,0 +1,48 @@
+import typing as t
+
+import cv2
+import numpy as np
+
+
+class Sequential(object):
+    def __init__(self, augmenters: t.List[t.Callable[[np.ndarray], np.ndarray]]):
+        self.augmenters = augmenters
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        for augmenter in self.augmenters:
+            image = augmenter(image)
+
+        return image
+
+
+class Add(object):
+    """Add a value sampled from [low, high] to every channel, saturating at the uint8 bounds."""
+
+    def __init__(self, value: t.Tuple[int, int]):
+        self.low, self.high = value
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        value = np.random.randint(self.low, self.high + 1)
+        table = np.clip(np.arange(256) + value, 0, 255).astype(np.uint8)
+
+        return cv2.LUT(image, table)
+
+
+class AddToHueAndSaturation(object):
+    """Add a value sampled from [low, high] to the hue and saturation of an RGB image, on the [0, 255] scale."""
+
+    def __init__(self, value: t.Tuple[int, int]):
+        self.low, self.high = value
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        value = np.random.randint(self.low, self.high + 1)
+        hue = int(value / 255 * 180)
+        table = np.stack((
+            np.mod(np.arange(256) + hue, 180),
+            np.clip(np.arange(256) + value, 0, 255),
+            np.arange(256),
+        ), axis=-1).astype(np.uint8).reshape(256, 1, 3)
+
+        image = cv2.LUT(cv2.cvtColor(image, cv2.COLOR_RGB2HSV), table)
+
+        return cv2.cvtColor(image, cv2.COLOR_HSV2RGB)
@@ -1,12 +1,12 @@
 import typing as t
 
-import imgaug.augmenters as ia
 import numpy as np
 import pandas as pd
 import torch as th
 import torch.utils.data as thd
 
 import constants as ct
+import databunch.augment as da
 import databunch.label as pil
 import databunch.video as piv
 import databunch.video_meta as pim
@@ -21,8 +21,9 @@ def init_worker(_id: int):
 def collate(batch: [(piv.Video, pil.Label)]) -> (th.Tensor, th.Tensor, t.List[pim.VideoMeta]):
     videos, labels, metas = zip(*batch)
 
-    input_data = th.stack([th.stack(video.data, dim=0) for video in videos], dim=0)
-    recon_data = th.stack([th.stack(video.recon, dim=0) for video in videos], dim=0)
+    # default_collate stacks into shared memory inside a worker, so handing the batch over needs no extra copy.
+    input_data = thd.dataloader.default_collate([video.data for video in videos])
+    recon_data = thd.dataloader.default_collate([video.recon for video in videos])
     class_data = th.tensor([label.data for label in labels], dtype=th.int64)
 
     return input_data, class_data, recon_data, metas
@@ -48,31 +49,26 @@ class VideoDataset(thd.Dataset):
                 self._stratified_sample_meta(data_opts.keep)
             else:
                 self.meta = self.meta.iloc[0:data_opts.keep]
+        self.meta_records = self.meta[pim.VideoMeta.fields].to_records(index=False)
         self.aug_seq = self._compose_aug_seq()
 
-    def _compose_aug_seq(self) -> ia.Sequential:
+    def _compose_aug_seq(self) -> t.Optional[da.Sequential]:
         if self.do.setting == 'train':
-            aug_seq = ia.Sequential([
-                ia.PadToFixedSize(224, 224),
-                ia.CropToFixedSize(224, 224),
-                ia.Fliplr(0.5),
-                ia.Flipud(0.5),
-                ia.Add((25, 25)),
-                ia.AddToHueAndSaturation((-25, 25)),
+            aug_seq = da.Sequential([
+                da.Add((25, 25)),
+                da.AddToHueAndSaturation((-25, 25)),
             ])
         else:
-            aug_seq = ia.Sequential([
-                ia.PadToFixedSize(224, 224, position='center'),
-                ia.CropToFixedSize(224, 224, position='center'),
-            ])
+            aug_seq = None
 
         return aug_seq
 
     def __getitem__(self, item: int) -> t.Tuple[piv.Video, pil.Label, pim.VideoMeta]:
-        video_meta = pim.VideoMeta(**self.meta.iloc[item][pim.VideoMeta.fields].to_dict())
+        video_meta = pim.VideoMeta(*self.meta_records[item].tolist())
 
         video = piv.Video(video_meta, ct.WORK_ROOT / self.do.root_path, self.do.read_jpeg,
-                          self.cut, self.do.setting, self.so.num_segments, self.do.use_flow, self.aug_seq)
+                          self.cut, self.do.setting, self.so.num_segments, self.do.use_flow, self.frame_size,
+                          self.aug_seq)
         label = pil.Label(video_meta)
 
         video.to_tensor()
@@ -89,11 +85,9 @@ class VideoDataset(thd.Dataset):
         return string
 
     def _stratified_sample_meta(self, keep: float):
-        samples = []
-        for lid in self.meta['lid'].unique():
-            class_meta = self.meta[self.meta['lid'] == lid]
-            cut_off = round(len(class_meta) * keep)
-            class_meta_sample = class_meta.iloc[0:cut_off]
-            samples.append(class_meta_sample)
-
-        self.meta = pd.concat(samples, verify_integrity=True)
+        groups = self.meta.groupby('lid', sort=False)
+        mask = groups.cumcount() < groups['lid'].transform('size').mul(keep).round()
+        sample = self.meta[mask]
+
+        order = np.argsort(pd.factorize(sample['lid'])[0], kind='stable')
+        self.meta = sample.iloc[order]
@@ -4,17 +4,18 @@ import typing as t
 
 import cv2
 import cv2.optflow as optf
-import imgaug.augmenters as ia
 import numpy as np
 import torch as th
-import torchvision.transforms.functional as tv_func
+import torchvision.io as tv_io
 
+import databunch.augment as da
 import databunch.video_meta as vm
 
 
 class Video(object):
-    def __init__(self, meta: vm.VideoMeta, root_path: pl.Path, read_jpeg: bool,
-                 cut: float, setting: str, num_segments: int, flow: bool, aug_seq: ia.Sequential):
+    def __init__(self, meta: vm.VideoMeta, root_path: pl.Path, read_jpeg: bool, cut: float, setting: str,
+                 num_segments: int, flow: bool, frame_size: t.Union[int, t.Tuple[int, int]],
+                 aug_seq: t.Optional[da.Sequential]):
         assert 0.0 <= cut <= 1.0, f'Cut should be a value between 0.0 and 1.0. Received: {cut}.'
         assert setting in ['train', 'eval'], f'Unknown setting: {setting}.'
 
@@ -25,6 +26,7 @@ class Video(object):
         self.setting = setting
         self.num_segments = num_segments
         self.flow = flow
+        self.frame_size = (frame_size, frame_size) if isinstance(frame_size, int) else tuple(frame_size)
         self.aug_seq = aug_seq
 
         self.flow_algo = cv2.optflow.createOptFlow_Farneback()
@@ -43,15 +45,46 @@ class Video(object):
         return data
 
     def _do_augment(self):
-        det_aug_seq = self.aug_seq.to_deterministic()
+        data = self._crop_and_flip(self.data)
+        if self.aug_seq is not None:
+            # The colour augmenters are pixel-wise, so the clip can go through as one tall image and share parameters.
+            t, h, w, c = data.shape
+            data = self.aug_seq(data.reshape(t * h, w, c)).reshape(t, h, w, c)
 
-        return [det_aug_seq.augment_image(frame) for frame in self.data]
+        return data
+
+    def _crop_and_flip(self, frames: t.List[np.ndarray]) -> np.ndarray:
+        """Pad, crop and flip all frames of the clip with the same sampled geometry."""
+        h, w, _ = frames[0].shape
+        fh, fw = self.frame_size
+        pad_h, pad_w = max(0, fh - h), max(0, fw - w)
+        if pad_h or pad_w:
+            top, left = self._offset(pad_h), self._offset(pad_w)
+            pad = ((top, pad_h - top), (left, pad_w - left), (0, 0))
+            frames = [np.pad(frame, pad, mode='constant') for frame in frames]
+            h, w, _ = frames[0].shape
+
+        y, x = self._offset(h - fh), self._offset(w - fw)
+        frames = [frame[y:y + fh, x:x + fw] for frame in frames]
+        if self.setting == 'train':
+            if np.random.rand() < 0.5:
+                frames = [frame[:, ::-1] for frame in frames]
+            if np.random.rand() < 0.5:
+                frames = [frame[::-1] for frame in frames]
 
-    def _get_recon(self):
-        data = ia.Resize(56)(images=self.data)
+        return np.stack(frames, axis=0)
+
+    def _offset(self, slack: int) -> int:
+        if self.setting == 'train':
+            return np.random.randint(0, slack + 1)
+        else:
+            return slack // 2
+
+    def _get_recon(self) -> np.ndarray:
+        data = [cv2.resize(frame, (56, 56), interpolation=cv2.INTER_CUBIC) for frame in self.data]
         recon = self._flow_data(data) if self.flow else data
 
-        return recon
+        return np.stack(recon, axis=0)
 
     def _cut_locs(self) -> np.ndarray:
         all_locs = np.arange(self.meta.length)
@@ -92,7 +125,8 @@ class Video(object):
         subsample_paths = paths[self.subsample_locs]
         data = []
         for path in subsample_paths:
-            data.append(cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2RGB))
+            frame = tv_io.decode_jpeg(tv_io.read_file(str(path)), mode=tv_io.ImageReadMode.RGB)
+            data.append(frame.permute(1, 2, 0).numpy())
 
         return data
 
@@ -122,23 +156,26 @@ class Video(object):
         return _flow
 
     def to_tensor(self):
-        self.data = [tv_func.to_tensor(frame) for frame in self.data]
-        self.recon = [tv_func.to_tensor(flow) for flow in self.recon]
+        self.data = th.from_numpy(self.data)
+        self.recon = th.from_numpy(self.recon)
 
     def to_numpy(self):
-        if isinstance(self.data, list):
-            for i in range(len(self.data)):
-                if isinstance(self.data[i], th.Tensor):
-                    self.data[i] = self.data[i].cpu().numpy()
-        if isinstance(self.recon, list):
-            for i in range(len(self.recon)):
-                if isinstance(self.recon[i], th.Tensor):
-                    self.recon[i] = self.recon[i].cpu().numpy()
-        self.data = np.transpose(np.stack(self.data, axis=0), axes=(0, 2, 3, 1))
-        self.recon = np.transpose(np.stack(self.recon, axis=0), axes=(0, 2, 3, 1))
+        if isinstance(self.data, th.Tensor):
+            self.data = self.data.cpu().numpy()
+        if isinstance(self.recon, th.Tensor):
+            self.recon = self.recon.cpu().numpy()
+        self.data = self._unit_range(self.data)
+        self.recon = self._unit_range(self.recon)
+
+    @staticmethod
+    def _unit_range(data: np.ndarray) -> np.ndarray:
+        if data.dtype == np.uint8:
+            return data.astype(np.float32) / 255
+
+        return data
 
     def __str__(self):
-        return f'Video {self.meta.id} ({"x".join(map(str, (len(self.data), *self.data[0].shape)))})'
+        return f'Video {self.meta.id} ({"x".join(map(str, self.data.shape))})'
 
     def __repr__(self):
         return self.__str__()
@@ -35,6 +35,9 @@ class ExperimentLogger(object):
 
     def __init__(self, opts: eo.ExperimentOptions, main_proc: bool, train_metrics: str, dev_metrics: str):
         self.opts = opts
+        self.opts_dict = dc.asdict(opts)
+        hp.path_to_string(self.opts_dict)
+        self.hparams = hp.flatten_dict(self.opts_dict)
         self.main_proc = main_proc
         self.train_metrics = sm.Metrics[train_metrics].value
         self.dev_metrics = sm.Metrics[dev_metrics].value
@@ -110,18 +113,10 @@ class ExperimentLogger(object):
             self.log(str(lr_scheduler.state_dict() if lr_scheduler else None))
 
     def print_options(self):
-        def inner(opts: t.Any, prefix: str = ''):
-            for name, value in opts.items():
-                if isinstance(value, dict):
-                    p = prefix + f'.{name}' if prefix else f'{name}'
-                    inner(value, p)
-                else:
-                    p = prefix + f'.{name}' if prefix else f'{name}'
-                    self.log(f'{p:<50s}{str(value):>50s}')
-
-        self.log(f'{"Field":<50s}{"Value":>50s}')
-        self.log(f'{"=" * 49:<50s}{"=" * 49:>50s}')
-        inner(dc.asdict(self.opts))
+        opts = hp.flatten_dict(self.opts_dict, sep='.')
+        lines = [f'{"Field":<50s}{"Value":>50s}', f'{"=" * 49:<50s}{"=" * 49:>50s}']
+        lines.extend(f'{name:<50s}{value:>50s}' for name, value in opts.items())
+        self.log('\n'.join(lines))
 
     @_Decorator.main_proc_only
     def log_metrics(self, metrics: t.Dict[str, float]):
@@ -140,9 +135,7 @@ class ExperimentLogger(object):
     @_Decorator.main_proc_only
     def persist_run_opts(self):
         with open(str(ct.WORK_ROOT / self.opts.run_dir / 'run.json'), 'w') as file:
-            opts = dc.asdict(self.opts)
-            hp.path_to_string(opts)
-            json.dump(opts, file, indent=True)
+            json.dump(self.opts_dict, file, indent=True)
 
     @_Decorator.main_proc_only
     def persist_metrics(self, metrics: t.Dict[str, float], split: str):
@@ -158,9 +151,8 @@ class ExperimentLogger(object):
 
     @_Decorator.main_proc_only
     def persist_experiment(self):
-        hparams = hp.flatten_dict(dc.asdict(self.opts))
         metrics = {f'{self.METRIC_TAG}/{k}': v for k, v in self.metrics.items()}
-        self.tb_logger.writer.add_hparams(hparams, metrics)
+        self.tb_logger.writer.add_hparams(self.hparams, metrics)
 
     @_Decorator.main_proc_only
     def close(self):
@@ -28,8 +28,8 @@ class Upsample(nn.Module):
 
         self.shape = shape
 
-    def forward(self, _in: th.Tensor):
-        return nn.functional.interpolate(_in, self.shape)
+    def forward(self, _in: th.Tensor) -> th.Tensor:
+        return nn.functional.interpolate(_in, size=self.shape, mode='nearest')
 
 
 class Flatten(nn.Module):
@@ -56,8 +56,10 @@ class Unflatten(nn.Module):
 class Standardize(nn.Module):
     def __init__(self, means: tp.List[float], stds: tp.List[float]):
         super(Standardize, self).__init__()
-        self.means = nn.Parameter(th.tensor(means, dtype=th.float).reshape((1, 3, 1, 1)), requires_grad=False)
-        self.stds = nn.Parameter(th.tensor(stds, dtype=th.float).reshape((1, 3, 1, 1)), requires_grad=False)
+        means = th.tensor(means, dtype=th.float).reshape((1, 3, 1, 1))
+        stds = th.tensor(stds, dtype=th.float).reshape((1, 3, 1, 1))
+        self.register_buffer('inv_stds', stds.reciprocal())
+        self.register_buffer('bias', means.neg().div(stds))
 
     def forward(self, _in: th.Tensor) -> th.Tensor:
-        return _in.sub(self.means).div(self.stds)
+        return th.addcmul(self.bias.to(_in.dtype), _in, self.inv_stds.to(_in.dtype))
\ No newline at end of file
@@ -27,14 +27,45 @@ def get_padding_shape(filter_shape: tp.List[int], stride: tp.List[int]) -> tp.Li
     return padding_shape
 
 
-def simplify_padding(padding_shapes: tp.List[int]) -> tp.Tuple[bool, int]:
-    all_same = True
-    padding_init = padding_shapes[0]
-    for pad in padding_shapes[1:]:
-        if pad != padding_init:
-            all_same = False
+def split_padding(padding_shape: tp.List[int]) -> tp.Tuple[tp.Tuple[int, int, int], tp.Optional[tp.List[int]]]:
+    """Split a ConstantPad3d padding shape into symmetric (d, h, w) conv padding and a residual pad, if any."""
+    sym = [min(padding_shape[i], padding_shape[i + 1]) for i in range(0, len(padding_shape), 2)]
+    residual = [pad - sym[i // 2] for i, pad in enumerate(padding_shape)]
 
-    return all_same, padding_init
+    return tuple(reversed(sym)), residual if any(residual) else None
+
+
+def set_tf32(allow: bool):
+    """Toggle TF32 math for convolutions and matmuls. A no-op before Ampere."""
+    if not th.cuda.is_available() or th.cuda.get_device_capability()[0] < 8:
+        return
+
+    th.backends.cuda.matmul.allow_tf32 = allow
+    th.backends.cudnn.allow_tf32 = allow
+    if hasattr(th, 'set_float32_matmul_precision'):
+        th.set_float32_matmul_precision('high' if allow else 'highest')
+
+
+def nest_state_dict(state_dict: tp.Dict[str, th.Tensor], prefix: str, name: str, container: nn.Module):
+    """Rename the checkpoint keys of layers that have since been grouped in `container`, registered as `name`."""
+    for child in container._modules:
+        for key in [key for key in state_dict if key.startswith(f'{prefix}{child}.')]:
+            state_dict[f'{prefix}{name}.{key[len(prefix):]}'] = state_dict.pop(key)
+
+
+def compile_model(model: nn.Module, mode: str = 'reduce-overhead') -> nn.Module:
+    """Compile the model with static shapes if torch.compile is available, else return it unchanged."""
+    if not hasattr(th, 'compile'):
+        return model
+
+    return th.compile(model, mode=mode, fullgraph=True, dynamic=False)
+
+
+def is_compiling() -> bool:
+    """Whether torch.compile is tracing the caller. Always False on torch versions without torch.compile."""
+    compiler = getattr(th, 'compiler', None)
+
+    return compiler is not None and hasattr(compiler, 'is_compiling') and compiler.is_compiling()
 
 
 def count_parameters(model: nn.Module) -> int:
@@ -50,3 +81,29 @@ def he_init(model: nn.Module):
         elif isinstance(module, nn.BatchNorm2d):
             module.weight.data.fill_(1)
             module.bias.data.zero_()
+
+
+def graph_trunks(model: nn.Module, sample_input: th.Tensor) -> nn.Module:
+    """Capture every `trunk` as a CUDA graph that replays in train mode for the shape of `sample_input`."""
+    for module in model.modules():
+        trunk = getattr(module, 'trunk', None)
+        if not isinstance(trunk, nn.Sequential):
+            continue
+
+        # warmup and capture run on the sample, so keep the batch norm statistics from before.
+        buffers = [buffer.clone() for buffer in trunk.buffers()]
+        trunk.train()
+        eager_forward = trunk.forward
+        graphed_forward = th.cuda.make_graphed_callables(trunk, (sample_input,)).forward
+        with th.no_grad():
+            for buffer, saved in zip(trunk.buffers(), buffers):
+                buffer.copy_(saved)
+
+        def forward(_in: th.Tensor, _trunk=trunk, _graphed=graphed_forward, _eager=eager_forward) -> th.Tensor:
+            if _trunk.training and _in.shape == sample_input.shape:
+                return _graphed(_in)
+            return _eager(_in)
+
+        trunk.forward = forward
+
+    return model
@@ -41,14 +41,11 @@ class Unit3D(nn.Module):
 
         padding_shape = hp.get_padding_shape(opts.kernel_size, opts.stride)
         if opts.padding == 'SAME':
-            simplify_pad, pad_size = hp.simplify_padding(padding_shape)
-            if simplify_pad:
-                self.conv3d = nn.Conv3d(opts.in_channels, opts.out_channels, opts.kernel_size, stride=opts.stride,
-                                        padding=pad_size, bias=opts.use_bias)
-            else:
-                self.pad = nn.ConstantPad3d(padding_shape, 0)
-                self.conv3d = nn.Conv3d(opts.in_channels, opts.out_channels, opts.kernel_size, stride=opts.stride,
-                                        bias=opts.use_bias)
+            pad_size, residual_pad = hp.split_padding(padding_shape)
+            if residual_pad is not None:
+                self.pad = nn.ConstantPad3d(residual_pad, 0)
+            self.conv3d = nn.Conv3d(opts.in_channels, opts.out_channels, opts.kernel_size, stride=opts.stride,
+                                    padding=pad_size, bias=opts.use_bias)
         elif opts.padding == 'VALID':
             pad_size = 0
             self.conv3d = nn.Conv3d(opts.in_channels, opts.out_channels, opts.kernel_size,
@@ -62,15 +59,44 @@ class Unit3D(nn.Module):
             self.activation = nn.ReLU()
 
     def forward(self, _in: th.Tensor) -> th.Tensor:
+        return self.post(self.conv(_in))
+
+    def conv(self, _in: th.Tensor) -> th.Tensor:
         if self.pad is not None:
             _in = self.pad(_in)
-        _out = self.conv3d(_in)
+
+        return self.conv3d(_in)
+
+    def post(self, _out: th.Tensor, out: tp.Optional[th.Tensor] = None) -> th.Tensor:
+        """Apply the batch norm and activation, writing into out if given."""
         if self.batch3d is not None:
             _out = self.batch3d(_out)
-        if self.activation is not None:
-            _out = self.activation(_out)
+        if out is None:
+            return _out if self.activation is None else self.activation(_out)
 
-        return _out
+        if self.activation is None:
+            return out.copy_(_out)
+
+        return th.clamp_min(_out, 0, out=out)
+
+    def fuse_bn(self):
+        """Fold the frozen batch norm statistics into the convolution. Only valid in eval mode."""
+        if self.batch3d is None:
+            return
+        if self.training:
+            raise RuntimeError('Batch norm can only be fused into the convolution in eval mode.')
+
+        self.conv3d = nn.utils.fusion.fuse_conv_bn_eval(self.conv3d, self.batch3d)
+        self.batch3d = None
+
+
+def fuse_bn(model: nn.Module) -> nn.Module:
+    """Fold batch norm into the convolution of every Unit3D in an eval mode model, e.g. before inference."""
+    for module in model.modules():
+        if isinstance(module, Unit3D):
+            module.fuse_bn()
+
+    return model
 
 
 class Mixed(nn.Module):
@@ -107,11 +133,58 @@ class Mixed(nn.Module):
         else:
             self.branch_3 = nn.Sequential(branch_3_conv2)
 
+        # The 1x1x1 convolutions that read the block input directly can run as one wider convolution.
+        self.max_pool = max_pool
+        self.fuse_heads = kernel_depth[0] == kernel_depth[1] == kernel_depth[3] == 1
+        if not max_pool:
+            self.fuse_heads = self.fuse_heads and kernel_depth[6] == 1
+
+    def _heads(self) -> tp.List[Unit3D]:
+        heads = [self.branch_0, self.branch_1[0], self.branch_2[0]]
+        if not self.max_pool:
+            heads.append(self.branch_3[0])
+
+        return heads
+
+    def _conv_heads(self, _in: th.Tensor) -> tp.Tuple[th.Tensor, ...]:
+        convs = [head.conv3d for head in self._heads()]
+        weight = th.cat([conv.weight for conv in convs], 0)
+        bias = None if convs[0].bias is None else th.cat([conv.bias for conv in convs], 0)
+        _out = nn.functional.conv3d(_in, weight, bias)
+
+        return th.split(_out, [head.conv3d.out_channels for head in self._heads()], 1)
+
+    def _conv_branches(self, _in: th.Tensor) -> tp.List[th.Tensor]:
+        """Run every branch up to and including the convolution of its last unit."""
+        if self.fuse_heads:
+            _outs = self._conv_heads(_in)
+            _out_0 = _outs[0]
+            _out_1 = self.branch_1[-1].conv(self.branch_1[0].post(_outs[1]))
+            _out_2 = self.branch_2[-1].conv(self.branch_2[0].post(_outs[2]))
+            _out_3 = self.branch_3[-1].conv(self.branch_3[0](_in)) if self.max_pool else _outs[3]
+        else:
+            _out_0 = self.branch_0.conv(_in)
+            _out_1 = self.branch_1[-1].conv(self.branch_1[:-1](_in))
+            _out_2 = self.branch_2[-1].conv(self.branch_2[:-1](_in))
+            _out_3 = self.branch_3[-1].conv(self.branch_3[:-1](_in))
+
+        return [_out_0, _out_1, _out_2, _out_3]
+
     def forward(self, _in: th.Tensor) -> th.Tensor:
-        _out_0 = self.branch_0(_in)
-        _out_1 = self.branch_1(_in)
-        _out_2 = self.branch_2(_in)
-        _out_3 = self.branch_3(_in)
-        _out = th.cat((_out_0, _out_1, _out_2, _out_3), 1)
+        tails = [self.branch_0, self.branch_1[-1], self.branch_2[-1], self.branch_3[-1]]
+        _outs = self._conv_branches(_in)
+        if self.training or th.is_grad_enabled() or hp.is_compiling():
+            return th.cat([tail.post(_out) for tail, _out in zip(tails, _outs)], 1)
+
+        # Without autograd each branch writes straight into its slice of the block output.
+        b, _, t, h, w = _outs[0].shape
+        channels = [_out.shape[1] for _out in _outs]
+        memory_format = th.contiguous_format
+        if _in.is_contiguous(memory_format=th.channels_last_3d):
+            memory_format = th.channels_last_3d
+        _out = th.empty((b, sum(channels), t, h, w), dtype=_outs[0].dtype, device=_outs[0].device,
+                        memory_format=memory_format)
+        for tail, branch_out, out in zip(tails, _outs, th.split(_out, channels, 1)):
+            tail.post(branch_out, out=out)
 
         return _out
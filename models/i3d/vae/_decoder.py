@@ -1,8 +1,12 @@
 # Based on implementation from https://github.com/hassony2/kinetics_i3d_pytorch
+import collections as cl
+import typing as tp
+
 import torch as th
 from torch import nn
 
 import models.common as mc
+import models.helpers as hp
 import models.i3d.common.blocks as ib
 from options import model_options as mo
 
@@ -15,69 +19,134 @@ class I3DDecoder(nn.Module):
         self.name = name
 
         # latent_size x 1 x 7 x 7
-        self.mixed_1a = ib.Mixed(self.latent_size, [256, 160, 320, 32, 128, 128], max_pool=False)
+        mixed_1a = ib.Mixed(self.latent_size, [256, 160, 320, 32, 128, 128], max_pool=False)
         # 832 x 1 x 7 x 7
-        self.mixed_1b = ib.Mixed(832, [256, 160, 320, 32, 128, 128], max_pool=False)
+        mixed_1b = ib.Mixed(832, [256, 160, 320, 32, 128, 128], max_pool=False)
         # 832 x 1 x 7 x 7
         frames = max(1, self.time_steps // 4)
-        self.up_4x14x14 = mc.Upsample((frames, 14, 14))
+        up_4x14x14 = mc.Upsample((frames, 14, 14))
         # 832 x 1 x 14 x 14
-        self.mixed_2a = ib.Mixed(832, [112, 144, 288, 32, 64, 64], max_pool=False)
+        mixed_2a = ib.Mixed(832, [112, 144, 288, 32, 64, 64], max_pool=False)
         # 528 x 1 x 14 x 14
-        self.mixed_2b = ib.Mixed(528, [128, 128, 256, 24, 64, 64], max_pool=False)
+        mixed_2b = ib.Mixed(528, [128, 128, 256, 24, 64, 64], max_pool=False)
         # 512 x 1 x 14 x 14
-        self.mixed_2c = ib.Mixed(512, [160, 112, 224, 24, 64, 64], max_pool=False)
+        mixed_2c = ib.Mixed(512, [160, 112, 224, 24, 64, 64], max_pool=False)
         # 512 x 1 x 14 x 14
-        self.mixed_2d = ib.Mixed(512, [192, 96, 208, 16, 48, 64], max_pool=False)
+        mixed_2d = ib.Mixed(512, [192, 96, 208, 16, 48, 64], max_pool=False)
         # 512 x 1 x 14 x 14
-        self.mixed_2e = ib.Mixed(512, [128, 128, 192, 32, 96, 64], max_pool=False)
+        mixed_2e = ib.Mixed(512, [128, 128, 192, 32, 96, 64], max_pool=False)
         # 480 x 2 x 14 x 14
         frames = max(1, self.time_steps // 2)
-        self.up_8x28x28 = mc.Upsample((frames, 28, 28))
+        up_8x28x28 = mc.Upsample((frames, 28, 28))
         # 480 x 2 x 28 x 28
-        self.mixed_3a = ib.Mixed(480, [64, 96, 128, 16, 32, 32], max_pool=False)
+        mixed_3a = ib.Mixed(480, [64, 96, 128, 16, 32, 32], max_pool=False)
         # 256 x 2 x 28 x 28
         opts = mo.Unit3DOptions(in_channels=256, out_channels=192, kernel_size=[3, 3, 3])
-        self.mixed_3b = ib.Unit3D(opts)
+        mixed_3b = ib.Unit3D(opts)
         # 192 x 2 x 28 x 28
-        self.up_8x56x56 = mc.Upsample((frames, 56, 56))
+        up_8x56x56 = mc.Upsample((frames, 56, 56))
         # 192 x 2 x 56 x 56
         opts = mo.Unit3DOptions(in_channels=192, out_channels=64, kernel_size=[3, 3, 3])
-        self.conv3d_4a = ib.Unit3D(opts)
+        conv3d_4a = ib.Unit3D(opts)
         # 64 x 2 x 56 x 56
         opts = mo.Unit3DOptions(in_channels=64, out_channels=64, kernel_size=[3, 3, 3])
-        self.conv3d_4b = ib.Unit3D(opts)
+        conv3d_4b = ib.Unit3D(opts)
         # 64 x 2 x 56 x 56
         frames = self.time_steps
-        self.up_16x112x112 = mc.Upsample((frames, 112, 112))
+        up_16x112x112 = mc.Upsample((frames, 112, 112))
         # 64 x 4 x 112 x 112
         opts = mo.Unit3DOptions(in_channels=64, out_channels=32, kernel_size=[3, 5, 5])
-        self.conv3d_5a = ib.Unit3D(opts)
+        conv3d_5a = ib.Unit3D(opts)
         # 3 x 4 x 112 x 112
         opts = mo.Unit3DOptions(in_channels=32, out_channels=32, kernel_size=[3, 3, 3])
-        self.conv3d_5b = ib.Unit3D(opts)
+        conv3d_5b = ib.Unit3D(opts)
         # 3 x 4 x 112 x 112
-        self.up_16x224x224 = mc.Upsample((frames, 224, 224))
+        up_16x224x224 = mc.Upsample((frames, 224, 224))
         # 3 x 4 x 224 x 224
         opts = mo.Unit3DOptions(in_channels=32, out_channels=3, kernel_size=[3, 5, 5])
-        self.conv3d_6a = ib.Unit3D(opts)
+        conv3d_6a = ib.Unit3D(opts)
         # 3 x 4 x 224 x 224
         opts = mo.Unit3DOptions(in_channels=3, out_channels=3, kernel_size=[3, 3, 3],
                                 use_bn=False, use_bias=True, activation='none')
-        self.conv3d_6b = ib.Unit3D(opts)
-        # 3 x 4 x 224 x 224
-        self.sigmoid = nn.Sigmoid()
+        conv3d_6b = ib.Unit3D(opts)
+        self.body = nn.Sequential(cl.OrderedDict([
+            ('mixed_1a', mixed_1a),
+            ('mixed_1b', mixed_1b),
+            ('up_4x14x14', up_4x14x14),
+            ('mixed_2a', mixed_2a),
+            ('mixed_2b', mixed_2b),
+            ('mixed_2c', mixed_2c),
+            ('mixed_2d', mixed_2d),
+            ('mixed_2e', mixed_2e),
+            ('up_8x28x28', up_8x28x28),
+            ('mixed_3a', mixed_3a),
+            ('mixed_3b', mixed_3b),
+            ('up_8x56x56', up_8x56x56),
+            ('conv3d_4a', conv3d_4a),
+            ('conv3d_4b', conv3d_4b),
+            ('up_16x112x112', up_16x112x112),
+            ('conv3d_5a', conv3d_5a),
+            ('conv3d_5b', conv3d_5b),
+            ('up_16x224x224', up_16x224x224),
+            ('conv3d_6a', conv3d_6a),
+            ('conv3d_6b', conv3d_6b),
+        ]))
+
+        # Hooks that cast around the output head once it is quantized for inference.
+        self.quantize_hooks = []
+
+        self.to(memory_format=th.channels_last_3d)
+        self._register_load_state_dict_pre_hook(self._upgrade_state_dict)
+
+    def _upgrade_state_dict(self, state_dict: tp.Dict[str, th.Tensor], prefix: str, *args):
+        """Map checkpoints saved before the layers were grouped in the body onto the new keys."""
+        hp.nest_state_dict(state_dict, prefix, 'body', self.body)
+
+    def inference_quantize(self, dtype: th.dtype = th.float16) -> 'I3DDecoder':
+        """Cast the output head to dtype for inference. The decoder cannot be trained afterwards."""
+        if self.training:
+            raise RuntimeError('The output head can only be quantized in eval mode.')
+        if self.quantize_hooks:
+            return self
+
+        head = [self.body.conv3d_6a, self.body.conv3d_6b]
+        for module in head:
+            module.to(dtype)
+        self.quantize_hooks = [
+            head[0].register_forward_pre_hook(lambda _, _in: tuple(elem.to(dtype) for elem in _in)),
+            head[-1].register_forward_hook(lambda _, __, _out: _out.float()),
+        ]
+
+        return self
+
+    def train(self, mode: bool = True) -> 'I3DDecoder':
+        if mode and self.quantize_hooks:
+            raise RuntimeError('The output head was quantized for inference and cannot be trained.')
+
+        return super(I3DDecoder, self).train(mode)
+
+    def compile_for_shape(self, in_shape: tp.Tuple[int, ...]) -> nn.Module:
+        """Compile the eval mode decoder with max-autotune for in_shape and run one warm-up pass."""
+        if self.training:
+            raise RuntimeError('The decoder can only be compiled for a shape in eval mode.')
+
+        compiled = hp.compile_model(self, mode='max-autotune')
+        with th.no_grad():
+            compiled(th.zeros(in_shape, device=next(self.parameters()).device))
+
+        return compiled
 
-    def forward(self, _in: th.Tensor) -> th.tensor:
+    def forward(self, _in: th.Tensor) -> th.Tensor:
         b, s, c, t, h, w = _in.shape
 
-        _out = _in.reshape(b * s, c, t, h, w)
+        _out = self.body(_in.reshape(b * s, c, t, h, w).contiguous(memory_format=th.channels_last_3d))
 
-        for name, module in list(self.named_children())[:-1]:
-            _out = module(_out)
+        return self._postprocess(_out, b, s)
 
+    def _postprocess(self, _out: th.Tensor, b: int, s: int) -> th.Tensor:
+        """Squash to pixel range at inference and lay the frames out as (b, s, t, c, h, w)."""
         if not self.training:
-            _out = self.sigmoid(_out)
+            _out = _out.sigmoid_()
 
         _, c, t, h, w = _out.shape
-        return _out.reshape(b, s, c, t, h, w).transpose(2, 3).contiguous()
+        return _out.reshape(b, s, c, t, h, w).transpose(2, 3)
@@ -1,10 +1,12 @@
 # Based on implementation from https://github.com/hassony2/kinetics_i3d_pytorch
+import collections as cl
 import typing as tp
 
 import torch as th
 from torch import nn
 
 import models.common as mc
+import models.helpers as hp
 import models.i3d.common.blocks as ib
 from options import model_options as mo
 
@@ -17,39 +19,57 @@ class I3DEncoder(nn.Module):
 
         # 3 x 4 x 224 x 224
         opts = mo.Unit3DOptions(out_channels=64, in_channels=3, kernel_size=[7, 7, 7], stride=[2, 2, 2], padding='SAME')
-        self.conv3d_1a_7x7 = ib.Unit3D(opts)
+        conv3d_1a_7x7 = ib.Unit3D(opts)
         # 64 x 2 x 112 x 112
-        self.maxPool3d_2a_3x3 = ib.MaxPool3dTFPadding(kernel_size=[1, 3, 3], stride=[1, 2, 2], padding='SAME')
+        maxPool3d_2a_3x3 = ib.MaxPool3dTFPadding(kernel_size=[1, 3, 3], stride=[1, 2, 2], padding='SAME')
         # 64 x 2 x 56 x 56
         opts = mo.Unit3DOptions(out_channels=64, in_channels=64, kernel_size=[1, 1, 1], padding='SAME')
-        self.conv3d_2b_1x1 = ib.Unit3D(opts)
+        conv3d_2b_1x1 = ib.Unit3D(opts)
         # 64 x 2 x 56 x 56
         opts = mo.Unit3DOptions(out_channels=192, in_channels=64, kernel_size=[3, 3, 3], padding='SAME')
-        self.conv3d_2c_3x3 = ib.Unit3D(opts)
+        conv3d_2c_3x3 = ib.Unit3D(opts)
         # 192 x 2 x 56 x 56
-        self.maxPool3d_3a_3x3 = ib.MaxPool3dTFPadding(kernel_size=[1, 3, 3], stride=[1, 2, 2], padding='SAME')
+        maxPool3d_3a_3x3 = ib.MaxPool3dTFPadding(kernel_size=[1, 3, 3], stride=[1, 2, 2], padding='SAME')
         # 192 x 2 x 28 x 28
-        self.mixed_3b = ib.Mixed(192, [64, 96, 128, 16, 32, 32])
+        mixed_3b = ib.Mixed(192, [64, 96, 128, 16, 32, 32])
         # 256 x 2 x 28 x 28
-        self.mixed_3c = ib.Mixed(256, [128, 128, 192, 32, 96, 64])
+        mixed_3c = ib.Mixed(256, [128, 128, 192, 32, 96, 64])
         # 480 x 2 x 28 x 28
-        self.maxPool3d_4a_3x3 = ib.MaxPool3dTFPadding(kernel_size=(3, 3, 3), stride=(2, 2, 2), padding='SAME')
+        maxPool3d_4a_3x3 = ib.MaxPool3dTFPadding(kernel_size=(3, 3, 3), stride=(2, 2, 2), padding='SAME')
         # 480 x 1 x 14 x 14
-        self.mixed_4b = ib.Mixed(480, [192, 96, 208, 16, 48, 64])
+        mixed_4b = ib.Mixed(480, [192, 96, 208, 16, 48, 64])
         # 512 x 1 x 14 x 14
-        self.mixed_4c = ib.Mixed(512, [160, 112, 224, 24, 64, 64])
+        mixed_4c = ib.Mixed(512, [160, 112, 224, 24, 64, 64])
         # 512 x 1 x 14 x 14
-        self.mixed_4d = ib.Mixed(512, [128, 128, 256, 24, 64, 64])
+        mixed_4d = ib.Mixed(512, [128, 128, 256, 24, 64, 64])
         # 512 x 1 x 14 x 14
-        self.mixed_4e = ib.Mixed(512, [112, 144, 288, 32, 64, 64])
+        mixed_4e = ib.Mixed(512, [112, 144, 288, 32, 64, 64])
         # 528 x 1 x 14 x 14
-        self.mixed_4f = ib.Mixed(528, [256, 160, 320, 32, 128, 128])
+        mixed_4f = ib.Mixed(528, [256, 160, 320, 32, 128, 128])
         # 832 x 1 x 14 x 14
-        self.maxPool3d_5a_2x2 = ib.MaxPool3dTFPadding(kernel_size=(2, 2, 2), stride=(2, 2, 2))
+        maxPool3d_5a_2x2 = ib.MaxPool3dTFPadding(kernel_size=(2, 2, 2), stride=(2, 2, 2))
         # 832 x 1 x 7 x 7
-        self.mixed_5b = ib.Mixed(832, [256, 160, 320, 32, 128, 128])
+        mixed_5b = ib.Mixed(832, [256, 160, 320, 32, 128, 128])
         # 832 x 1 x 7 x 7
-        self.mixed_5c = ib.Mixed(832, [384, 192, 384, 48, 128, 128])
+        mixed_5c = ib.Mixed(832, [384, 192, 384, 48, 128, 128])
+        self.trunk = nn.Sequential(cl.OrderedDict([
+            ('conv3d_1a_7x7', conv3d_1a_7x7),
+            ('maxPool3d_2a_3x3', maxPool3d_2a_3x3),
+            ('conv3d_2b_1x1', conv3d_2b_1x1),
+            ('conv3d_2c_3x3', conv3d_2c_3x3),
+            ('maxPool3d_3a_3x3', maxPool3d_3a_3x3),
+            ('mixed_3b', mixed_3b),
+            ('mixed_3c', mixed_3c),
+            ('maxPool3d_4a_3x3', maxPool3d_4a_3x3),
+            ('mixed_4b', mixed_4b),
+            ('mixed_4c', mixed_4c),
+            ('mixed_4d', mixed_4d),
+            ('mixed_4e', mixed_4e),
+            ('mixed_4f', mixed_4f),
+            ('maxPool3d_5a_2x2', maxPool3d_5a_2x2),
+            ('mixed_5b', mixed_5b),
+            ('mixed_5c', mixed_5c),
+        ]))
         # 1024 x 1 x 7 x 7
         opts = mo.Unit3DOptions(in_channels=1024, out_channels=self.latent_planes, kernel_size=[1, 1, 1],
                                 activation='none', use_bias=False, use_bn=False)
@@ -63,13 +83,30 @@ class I3DEncoder(nn.Module):
         self.rsample = mc.ReparameterizedSample()
         # latent_size x 1 x 7 x 7
 
-    def forward(self, _in: th.Tensor, num_samples: int) -> tp.Tuple[th.tensor, th.Tensor, th.Tensor]:
-        _in = _in.transpose(1, 2).contiguous()
-        for name, module in list(self.named_children())[:-3]:
-            _in = module(_in)
+        self.to(memory_format=th.channels_last_3d)
+        self._register_load_state_dict_pre_hook(self._upgrade_state_dict)
 
-        _mean = self.mean(_in)
-        _var = self.var(_in) + 1e-5  # Lower bound variance of posterior to prevent infinite density.
+    def _upgrade_state_dict(self, state_dict: tp.Dict[str, th.Tensor], prefix: str, *args):
+        """Map checkpoints saved before the layers were grouped in the trunk onto the new keys."""
+        hp.nest_state_dict(state_dict, prefix, 'trunk', self.trunk)
+
+    def features(self, _in: th.Tensor) -> th.Tensor:
+        """Run the trunk only. The result can be cached and passed to posterior repeatedly."""
+        # Batches arrive as (B, T, H, W, C) permuted to (B, T, C, H, W), so the transpose is already channels last.
+        return self.trunk(_in.transpose(1, 2))
+
+    def posterior(self, _features: th.Tensor) -> tp.Tuple[th.Tensor, th.Tensor]:
+        # Keep the posterior heads in full precision so the variance floor survives mixed precision training.
+        if th.is_autocast_enabled():
+            _features = _features.float()
+        with th.autocast('cuda', enabled=False):
+            _mean = self.mean(_features)
+            _var = self.var(_features) + 1e-5  # Lower bound variance of posterior to prevent infinite density.
+
+        return _mean, _var
+
+    def forward(self, _in: th.Tensor, num_samples: int) -> tp.Tuple[th.Tensor, th.Tensor, th.Tensor]:
+        _mean, _var = self.posterior(self.features(_in))
 
         # num = 0 means 1 ML estimate
         b, c, t, h, w = _mean.shape
@@ -26,6 +26,8 @@ class DataLoaderOptions:
     pin_memory: Optional[bool] = False
     drop_last: Optional[bool] = False
     timeout: Optional[int] = 0
+    persistent_workers: Optional[bool] = False
+    prefetch_factor: Optional[int] = 2
 
 
 @dc.dataclass
@@ -26,6 +26,9 @@ class TrainerOptions:
     optim_opts: AdamOptimizerOptions
     criterion: str
     metrics: str
+    amp: Optional[bool] = False
+    cuda_graphs: Optional[bool] = False
+    tf32: Optional[bool] = True
 
 
 @dc.dataclass
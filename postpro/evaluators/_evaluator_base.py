@@ -17,7 +17,11 @@ import tqdm
 import constants as ct
 import databunch.databunch as db
 import logger as lg
+import models.helpers as mh
+import models.i3d.common.blocks as ib
 import options.experiment_options as eo
+import pro.engine as pe
+import pro.prefetch as pp
 import specs.maps as sm
 
 RESULTS = t.Tuple[t.Dict[str, np.ndarray], np.ndarray]
@@ -31,6 +35,7 @@ class BaseEvaluator(abc.ABC):
 
         self.rank, self.world_size = self._init_distributed()
         self.device = th.device(f'cuda' if cuda.is_available() else f'cpu')
+        mh.set_tf32(self.opts.trainer.tf32)
         self.data_bunch, self.opts.model.opts.num_classes = self._init_databunch()
         self.best_ckpt = self._get_best_ckpt()
         self.model = self._init_model()
@@ -74,11 +79,11 @@ class BaseEvaluator(abc.ABC):
                 if isinstance(module, (nn.BatchNorm2d, nn.BatchNorm3d, nn.SyncBatchNorm)):
                     module.momentum = 1.0
 
+        model = ib.fuse_bn(model.eval())
+
         if self.local_rank != -1:
             model = nn.parallel.DistributedDataParallel(model)
 
-        model.eval()
-
         return model
 
     @abc.abstractmethod
@@ -122,7 +127,7 @@ class BaseEvaluator(abc.ABC):
         return self
 
     def _calculate_metrics(self, evaluator: ie.Engine, loader: tud.DataLoader, split: str) -> t.Dict[str, float]:
-        evaluator.run(loader)
+        evaluator.run(pp.CudaPrefetcher(loader, self.device))
         self._aggregate_metrics(evaluator)
 
         return {f'{split}_{k}': float(v) for k, v in evaluator.state.metrics.items()}
@@ -134,7 +139,7 @@ class BaseEvaluator(abc.ABC):
         pbar = tqdm.tqdm(total=len(loader.dataset), leave=True)
         with th.no_grad():
             for i, (_in, _cls_gt, _recon_gt, videos) in enumerate(loader):
-                x = _in.to(device=self.device, non_blocking=True)
+                x = pe.to_frames(_in.to(device=self.device, non_blocking=True))
 
                 ids.extend([video.id for video in videos])
 
@@ -20,9 +20,12 @@ import databunch.label as dl
 import databunch.video as dv
 import helpers as hp
 import logger as lg
+import models.helpers as mh
+import models.i3d.common.blocks as ib
 import models.tadn.base.base_tadn as tadn
 import models.tarn.common.temporal_encoder as tarn
 import options.experiment_options as eo
+import pro.engine as pe
 import specs.maps as sm
 
 
@@ -201,13 +204,12 @@ class BaseVisualiser(abc.ABC):
             self.run_viz_dir = ct.WORK_ROOT / self.opts.run_dir / 'figures'
             self.run_viz_dir.mkdir(exist_ok=True)
             self.device = th.device(f'cpu')
+            mh.set_tf32(self.opts.trainer.tf32)
             self.data_bunch, self.opts.model.opts.num_classes = self._init_databunch()
             self.best_ckpt = self._get_best_ckpt()
             self.model = self._init_model()
             self.logger = lg.ExperimentLogger(self.opts, True, self.opts.trainer.metrics, self.opts.evaluator.metrics)
-            opts = dc.asdict(self.opts)
-            hp.path_to_string(opts)
-            self.logger.log(json.dumps(opts, indent=True))
+            self.logger.log(json.dumps(self.logger.opts_dict, indent=True))
 
             th.set_grad_enabled(False)
 
@@ -223,7 +225,7 @@ class BaseVisualiser(abc.ABC):
         model = sm.Models[self.opts.model.arch].value(**opts).to(self.device)
         model.load_state_dict(th.load(self.best_ckpt, map_location=self.device))
 
-        model = model.eval()
+        model = ib.fuse_bn(model.eval())
 
         return model
 
@@ -406,6 +408,10 @@ class BaseVisualiser(abc.ABC):
 
         return video, label
 
+    def model_input(self, video: dv.Video) -> th.Tensor:
+        """Batch the (T, H, W, C) frames of a single video the same way the trainer feeds the model."""
+        return pe.to_frames(th.as_tensor(video.data, device=self.device)[None])
+
     def select_dataset(self, split: str) -> ds.VideoDataset:
         assert split in ['train', 'dev', 'test'], f'Unknown split: {split}.'
         if split == 'train':
@@ -1,6 +1,5 @@
 import typing as t
 
-import numpy as np
 import torch as th
 
 import databunch.video as dv
@@ -9,13 +8,13 @@ import postpro.visualisers._visualiser_base as _base
 
 class AEVisualiser(_base.BaseVisualiser):
     def preds(self, video: dv.Video) -> t.List[th.Tensor]:
-        video_data = th.tensor(video.data[np.newaxis, :, :, :], dtype=th.float32, device=self.device)
+        video_data = self.model_input(video)
         _, pred, *_ = self.model(video_data)
 
         return [pred.squeeze()]
 
     def recons(self, video: dv.Video) -> t.List[th.Tensor]:
-        video_data = th.stack(video.data, dim=0).unsqueeze(0)
+        video_data = self.model_input(video)
         recon_pred, *_ = self.model(video_data)
 
         return [recon_pred.squeeze()]
@@ -12,7 +12,7 @@ class ClassVisualiser(_base.BaseVisualiser):
         raise RuntimeError('Reconstruction not available for classification visualiser.')
 
     def preds(self, video: dv.Video) -> t.List[th.Tensor]:
-        video_data = th.tensor(video.data[np.newaxis, :, :, :], dtype=th.float32, device=self.device)
+        video_data = self.model_input(video)
         pred, *_ = self.model(video_data)
 
         return [pred.squeeze()]
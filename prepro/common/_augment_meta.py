@@ -1,6 +1,10 @@
-from typing import Any, List, Tuple
+import concurrent.futures as cf
+import pathlib as pl
+import subprocess
+from typing import Any, Dict, List, Tuple
 
 import pandas as pd
+import skvideo
 import skvideo.io
 
 import constants as ct
@@ -9,6 +13,7 @@ import helpers as ghp
 import prepro.helpers as php
 
 DATA_ROOT_DIR = None
+PROBE_THREADS = 8
 
 
 def add_columns(meta: pd.DataFrame) -> None:
@@ -18,13 +23,24 @@ def add_columns(meta: pd.DataFrame) -> None:
     meta['framerate'] = None
 
 
+def _count_frames(video_path: pl.Path, video_meta: Dict[str, Any]) -> int:
+    """Frame count as skvideo.io.vread would return it, without decoding the video."""
+    if '@nb_frames' in video_meta:
+        return int(video_meta['@nb_frames'])
+
+    cmd = [f'{skvideo.getFFmpegPath()}/ffprobe', '-v', 'error', '-count_frames', '-select_streams', 'v:0',
+           '-show_entries', 'stream=nb_read_frames', '-of', 'default=nokey=1:noprint_wrappers=1', video_path.as_posix()]
+
+    return int(subprocess.check_output(cmd).decode().split('\n')[0])
+
+
 def _augment_row(row: pd.Series) -> pd.Series:
     video_path = DATA_ROOT_DIR / row['video_path']
 
-    video = skvideo.io.vread(video_path.as_posix())
-    video_meta = skvideo.io.ffprobe(video_path)['video']
+    video_meta = skvideo.io.ffprobe(video_path.as_posix())['video']
 
-    row['length'], row['height'], row['width'], _ = video.shape
+    row['length'] = _count_frames(video_path, video_meta)
+    row['height'], row['width'] = int(video_meta['@height']), int(video_meta['@width'])
     row['framerate'] = int(video_meta['@avg_frame_rate'].split('/')[0])
 
     return row
@@ -33,9 +49,9 @@ def _augment_row(row: pd.Series) -> pd.Series:
 def _augment_meta(batch: Tuple[int, List[Any]]) -> ghp.parallel.Result:
     no, batch = batch
 
-    rows = []
-    for index, row in batch:
-        rows.append((index, _augment_row(row)))
+    indices, rows = zip(*batch)
+    with cf.ThreadPoolExecutor(PROBE_THREADS) as executor:
+        rows = list(zip(indices, executor.map(_augment_row, rows)))
 
     return ghp.parallel.Result(len(batch), rows)
 
@@ -49,7 +65,7 @@ def main(dataset: str, split: int):
         env.LOGGER.info(f'Augmenting metadata at {path.as_posix()}...')
         meta = ghp.read_meta(path)
         add_columns(meta)
-        for index, row in ghp.parallel.execute(_augment_meta, list(meta.iterrows()), 1):
-            meta.loc[index] = row
+        rows = ghp.parallel.execute(_augment_meta, list(meta.iterrows()), PROBE_THREADS)
+        meta = pd.DataFrame.from_dict(dict(rows), orient='index').reindex(meta.index)
         meta.to_json(ct.WORK_ROOT / path, orient='index')
         env.LOGGER.info('...Done')
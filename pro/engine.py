@@ -2,11 +2,20 @@ import ignite.engine as ie
 import torch as th
 
 
+def to_frames(data: th.Tensor) -> th.Tensor:
+    """Turn a (B, T, H, W, C) batch as collated by the data loader into (B, T, C, H, W) floats in [0, 1]."""
+    data = data.permute(0, 1, 4, 2, 3)
+    if data.dtype == th.uint8:
+        data = data.float().div_(255)
+
+    return data
+
+
 def prepare_batch(batch, device, non_blocking):
     input_data, class_target_data, recon_target_data, _ = batch
-    input_data = ie.convert_tensor(input_data, device=device, non_blocking=non_blocking)
+    input_data = to_frames(ie.convert_tensor(input_data, device=device, non_blocking=non_blocking))
     class_target_data = ie.convert_tensor(class_target_data, device=device, non_blocking=non_blocking)
-    recon_target_data = ie.convert_tensor(recon_target_data, device=device, non_blocking=non_blocking)
+    recon_target_data = to_frames(ie.convert_tensor(recon_target_data, device=device, non_blocking=non_blocking))
 
     return input_data, class_target_data, recon_target_data
 
@@ -106,19 +115,23 @@ def create_ae_evaluator(model, metrics=None, device=th.device('cpu'), non_blocki
     return _engine
 
 
-def create_gsnn_trainer(model, optimizer, crt, metrics=None, device=th.device('cpu'), non_blocking=True) -> ie.Engine:
+def create_gsnn_trainer(model, optimizer, crt, metrics=None, device=th.device('cpu'), non_blocking=True,
+                        amp: bool = False) -> ie.Engine:
     if device:
         model.to(device)
+    scaler = th.cuda.amp.GradScaler(enabled=amp)
 
     def _update(_engine, batch):
         model.train()
         optimizer.zero_grad()
         _in, _cls_gt, _ = prepare_batch(batch, device=device, non_blocking=non_blocking)
-        _cls_pred, _temporal_latents, _class_latent, _mean, _var, _ = model(_in, num_samples=1)
-        ce, kld = crt(_cls_pred, _cls_gt, _mean, _var)
+        with th.autocast('cuda', enabled=amp):
+            _cls_pred, _temporal_latents, _class_latent, _mean, _var, _ = model(_in, num_samples=1)
+            ce, kld = crt(_cls_pred, _cls_gt, _mean, _var)
 
-        (ce + crt.kld_factor * kld).backward()
-        optimizer.step()
+        scaler.scale(ce + crt.kld_factor * kld).backward()
+        scaler.step(optimizer)
+        scaler.update()
 
         return (
             _cls_pred.detach(),
@@ -160,19 +173,23 @@ def create_gsnn_evaluator(model, metrics=None, device=None, num_samples: int = N
     return _engine
 
 
-def create_vae_trainer(model, optimizer, crt, metrics=None, device=th.device('cpu'), non_blocking=True) -> ie.Engine:
+def create_vae_trainer(model, optimizer, crt, metrics=None, device=th.device('cpu'), non_blocking=True,
+                       amp: bool = False) -> ie.Engine:
     if device:
         model.to(device)
+    scaler = th.cuda.amp.GradScaler(enabled=amp)
 
     def _update(_engine, batch):
         model.train()
         optimizer.zero_grad()
         _in, _cls_gt, _recon_gt = prepare_batch(batch, device=device, non_blocking=non_blocking)
-        _recon_pred, _cls_pred, _temporal_latents, _class_latent, _mean, _var, _ = model(_in, num_samples=1)
-        ce, l1, kld = crt(_recon_pred, _cls_pred, _recon_gt, _cls_gt, _mean, _var)
+        with th.autocast('cuda', enabled=amp):
+            _recon_pred, _cls_pred, _temporal_latents, _class_latent, _mean, _var, _ = model(_in, num_samples=1)
+            ce, l1, kld = crt(_recon_pred, _cls_pred, _recon_gt, _cls_gt, _mean, _var)
 
-        (ce + l1 + crt.kld_factor * kld).backward()
-        optimizer.step()
+        scaler.scale(ce + l1 + crt.kld_factor * kld).backward()
+        scaler.step(optimizer)
+        scaler.update()
 
         return (
             _recon_pred.detach(),
@@ -0,0 +1,44 @@
+import typing as typ
+
+import torch as th
+import torch.utils.data as thd
+
+
+class CudaPrefetcher(object):
+    """Copy the next batch to the GPU on a side stream while the current one is processed."""
+
+    def __init__(self, loader: thd.DataLoader, device: th.device):
+        self.loader = loader
+        self.device = device
+        self.stream = th.cuda.Stream(device) if device.type == 'cuda' else None
+
+    def __len__(self) -> int:
+        return len(self.loader)
+
+    def __iter__(self) -> typ.Iterator[typ.Tuple[typ.Any, ...]]:
+        if self.stream is None:
+            yield from self.loader
+            return
+
+        batches = iter(self.loader)
+        batch = self._preload(batches)
+        while batch is not None:
+            current_stream = th.cuda.current_stream(self.device)
+            current_stream.wait_stream(self.stream)
+            for elem in batch:
+                if isinstance(elem, th.Tensor):
+                    elem.record_stream(current_stream)
+
+            next_batch = self._preload(batches)
+            yield batch
+            batch = next_batch
+
+    def _preload(self, batches: typ.Iterator) -> typ.Optional[typ.Tuple[typ.Any, ...]]:
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return None
+
+        with th.cuda.stream(self.stream):
+            return tuple(elem.to(self.device, non_blocking=True) if isinstance(elem, th.Tensor) else elem
+                         for elem in batch)
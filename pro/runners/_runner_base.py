@@ -18,7 +18,9 @@ import constants as ct
 import databunch.databunch as db
 import helpers as ghp
 import logger as pl
+import models.helpers as mh
 import options.experiment_options as eo
+import pro.prefetch as pp
 import specs.maps as sm
 
 
@@ -58,6 +60,7 @@ class BaseRunner(abc.ABC):
         self.opts.run_dir = self._init_run()
 
         self.device = self._init_device()
+        mh.set_tf32(self.opts.trainer.tf32)
         self.data_bunch, self.opts.model.opts.num_classes = self._init_databunch()
         self.model, self.opts.model.size = self._init_model()
         self.criterion = self._init_criterion()
@@ -137,6 +140,8 @@ class BaseRunner(abc.ABC):
             self.opts.trainer.epochs = 4
             self.opts.databunch.dlo.num_workers = 0
             self.opts.databunch.dlo.timeout = 0
+            self.opts.databunch.dlo.persistent_workers = False
+            self.opts.databunch.dlo.prefetch_factor = 2
 
             self.opts.databunch.train_dso.keep = self.opts.databunch.dlo.batch_size * self.world_size * 2
             self.opts.databunch.dev_dso.keep = self.opts.databunch.dlo.batch_size * self.world_size * 2
@@ -167,6 +172,14 @@ class BaseRunner(abc.ABC):
                 if isinstance(module, (nn.BatchNorm2d, nn.BatchNorm3d, nn.SyncBatchNorm)):
                     module.momentum = 1.0
 
+        if self.opts.trainer.cuda_graphs:
+            if self.distributed or self.opts.trainer.amp or self.device.type != 'cuda':
+                raise ValueError('CUDA graphs are only supported for single GPU training without amp.')
+            frame_size = self.opts.databunch.frame_size
+            h, w = (frame_size, frame_size) if isinstance(frame_size, int) else frame_size
+            sample_input = th.zeros((self.opts.databunch.dlo.batch_size, 3, num_segments, h, w), device=self.device)
+            model = mh.graph_trunks(model, sample_input.contiguous(memory_format=th.channels_last_3d))
+
         if self.distributed:
             model = nn.SyncBatchNorm.convert_sync_batchnorm(model)
             model = nn.parallel.DistributedDataParallel(model, device_ids=[self.rank], output_device=self.rank)
@@ -302,7 +315,7 @@ class BaseRunner(abc.ABC):
         raise exception
 
     def _evaluate(self, _engine: ie.Engine) -> None:
-        self.evaluator.run(self.data_bunch.dev_loader)
+        self.evaluator.run(pp.CudaPrefetcher(self.data_bunch.dev_loader, self.device))
 
     def _aggregate_metrics(self, _engine: ie.Engine) -> None:
         local_names, global_names, values = [], [], []
@@ -331,4 +344,5 @@ class BaseRunner(abc.ABC):
     def run(self) -> None:
         if self.distributed:
             dist.barrier()
-        self.trainer.run(self.data_bunch.train_loader, max_epochs=self.opts.trainer.epochs)
+        self.trainer.run(pp.CudaPrefetcher(self.data_bunch.train_loader, self.device),
+                         max_epochs=self.opts.trainer.epochs)
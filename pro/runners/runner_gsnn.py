@@ -23,7 +23,8 @@ class GSNNRunner(_base.BaseRunner):
                                          self.optimizer,
                                          self.criterion,
                                          trainer_metrics,
-                                         self.device)
+                                         self.device,
+                                         amp=self.opts.trainer.amp)
         evaluator = pe.create_gsnn_evaluator(self.model,
                                              evaluator_metrics,
                                              self.device,
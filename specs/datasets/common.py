@@ -9,7 +9,9 @@ dlo = po.DataLoaderOptions(
     num_workers=8,
     pin_memory=True,
     drop_last=False,
-    timeout=120
+    timeout=120,
+    persistent_workers=True,
+    prefetch_factor=4
 )
 ########################################################################################################################
 # SAMPLING
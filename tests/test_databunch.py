@@ -1,7 +1,11 @@
+import cv2
+import numpy as np
 import pytest
 import tqdm
 
+import databunch.augment as da
 import databunch.databunch as db
+import databunch.video as dv
 import specs
 
 HMDB_DBO = [
@@ -18,6 +22,29 @@ SMTH_DBO = [
     specs.datasets.smth1.dbo_16
 ]
 
+AUG_VALUES = list(range(-25, 26))
+
+
+def _aug_image() -> np.ndarray:
+    image = np.random.RandomState(0).randint(0, 256, (4 * 56, 56, 3)).astype(np.uint8)
+    image[0, :4] = [[0, 0, 0], [255, 255, 255], [255, 0, 0], [255, 0, 255]]
+
+    return image
+
+
+def _video(setting: str, frame_size: tuple) -> dv.Video:
+    video = dv.Video.__new__(dv.Video)
+    video.setting = setting
+    video.frame_size = frame_size
+
+    return video
+
+
+def _clip(num_frames: int, h: int, w: int) -> list:
+    base = np.random.RandomState(0).randint(0, 200, (h, w, 3)).astype(np.uint8)
+
+    return [base + i for i in range(num_frames)]
+
 
 @pytest.mark.parametrize('dbo', HMDB_DBO + SMTH_DBO)
 def test_databunch(dbo):
@@ -46,3 +73,64 @@ def test_databunch(dbo):
         pbar.close()
 
     tqdm.tqdm.write('')
+
+
+@pytest.mark.parametrize('value', AUG_VALUES)
+def test_add_clips(value: int):
+    image = np.array([[[0, 1, 128], [24, 231, 255]]], dtype=np.uint8)
+    expected = np.clip(image.astype(np.int64) + value, 0, 255).astype(np.uint8)
+
+    assert np.array_equal(da.Add((value, value))(image), expected)
+
+
+@pytest.mark.parametrize('value', [-25, 25])
+def test_add_to_hue_wraps(value: int):
+    # Pure red sits at hue 0, so any shift has to wrap around OpenCV's [0, 180) hue range.
+    image = np.full((2, 2, 3), [255, 0, 0], dtype=np.uint8)
+    hue = cv2.cvtColor(da.AddToHueAndSaturation((value, value))(image), cv2.COLOR_RGB2HSV)[..., 0]
+
+    assert np.all(np.abs(hue.astype(np.int64) - int(value / 255 * 180) % 180) <= 1)
+
+
+@pytest.mark.parametrize('value', AUG_VALUES)
+def test_augmenters_match_imgaug(value: int):
+    iaa = pytest.importorskip('imgaug.augmenters')
+    image = _aug_image()
+
+    assert np.array_equal(da.Add((value, value))(image), iaa.Add(value).augment_image(image))
+    assert np.array_equal(da.AddToHueAndSaturation((value, value))(image),
+                          iaa.AddToHueAndSaturation(value).augment_image(image))
+
+
+def test_crop_and_flip_eval_centre_crop():
+    frames = _clip(4, 10, 12)
+    data = _video('eval', (4, 6))._crop_and_flip(frames)
+
+    assert data.shape == (4, 4, 6, 3)
+    assert np.array_equal(data, np.stack([frame[3:7, 3:9] for frame in frames]))
+
+
+@pytest.mark.parametrize('setting', ['train', 'eval'])
+def test_crop_and_flip_pads_small_frames(setting: str):
+    frames = _clip(4, 3, 5)
+    data = _video(setting, (7, 5))._crop_and_flip(frames)
+    rows = np.flatnonzero(data[0].any(axis=(1, 2)))
+
+    assert data.shape == (4, 7, 5, 3)
+    assert len(rows) == 3 and rows[-1] - rows[0] == 2
+    if setting == 'eval':
+        assert np.array_equal(data[:, 2:5], np.stack(frames))
+        assert not data[:, :2].any() and not data[:, 5:].any()
+
+
+def test_crop_and_flip_train_shares_geometry():
+    frames = _clip(4, 10, 12)
+    base = frames[0]
+    crops = [base[y:y + 4, x:x + 6] for y in range(7) for x in range(7)]
+    candidates = [crop[::dy, ::dx] for crop in crops for dy in [1, -1] for dx in [1, -1]]
+    np.random.seed(0)
+    for _ in range(20):
+        data = _video('train', (4, 6))._crop_and_flip(frames)
+
+        assert any(np.array_equal(data[0], candidate) for candidate in candidates)
+        assert all(np.array_equal(data[i], data[0] + i) for i in range(len(frames)))
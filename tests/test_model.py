@@ -1,11 +1,17 @@
+import copy
 import dataclasses as dc
 import timeit
 
 import pandas as pd
 import pytest
 import torch as th
+from torch import nn
 
 import helpers as hp
+import models.helpers as mh
+import models.i3d.common.blocks as ib
+import models.i3d.vae._decoder as vd
+import options.model_options as om
 import specs.maps as sm
 import specs.models as mo
 
@@ -33,6 +39,13 @@ VAE_ARGS = [
     ('tarn_vae_4', 4), ('tarn_vae_8', 8),
     ('i3d_vae_4', 4), ('i3d_vae_8', 8)
 ]
+SAME_PADDING_ARGS = [
+    ([7, 7, 7], [2, 2, 2]),
+    ([1, 1, 1], [1, 1, 1]),
+    ([1, 3, 3], [1, 1, 1]),
+    ([3, 3, 3], [1, 1, 1]),
+    ([3, 5, 5], [1, 1, 1]),
+]
 
 
 def _init_model(model_spec: str):
@@ -43,6 +56,53 @@ def _init_model(model_spec: str):
     return sm.Models[model_spec.arch].value(**opts), model_spec.opts
 
 
+def _randomise_batch_norm(model: nn.Module) -> nn.Module:
+    for module in model.modules():
+        if isinstance(module, nn.BatchNorm3d):
+            module.running_mean.uniform_(-1, 1)
+            module.running_var.uniform_(0.5, 2)
+            module.weight.data.uniform_(0.5, 2)
+            module.bias.data.uniform_(-1, 1)
+
+    return model
+
+
+def _reference_unit3d(unit: ib.Unit3D, _in: th.Tensor) -> th.Tensor:
+    """Pad, convolve, normalise and activate step by step, as Unit3D did before padding and batch norm were fused."""
+    conv = unit.conv3d
+    _in = nn.functional.pad(_in, mh.get_padding_shape(list(conv.kernel_size), list(conv.stride)))
+    _out = nn.functional.conv3d(_in, conv.weight, conv.bias, conv.stride)
+    if unit.batch3d is not None:
+        bn = unit.batch3d
+        _out = nn.functional.batch_norm(_out, bn.running_mean, bn.running_var, bn.weight, bn.bias, eps=bn.eps)
+    if unit.activation is not None:
+        _out = nn.functional.relu(_out)
+
+    return _out
+
+
+def _reference_mixed(mixed: ib.Mixed, _in: th.Tensor) -> th.Tensor:
+    """Run every branch unit by unit and concatenate, as Mixed did before its heads were fused."""
+    _outs = []
+    for branch in [[mixed.branch_0], mixed.branch_1, mixed.branch_2, mixed.branch_3]:
+        _out = _in
+        for module in branch:
+            _out = _reference_unit3d(module, _out) if isinstance(module, ib.Unit3D) else module(_out)
+        _outs.append(_out)
+
+    return th.cat(_outs, 1)
+
+
+@pytest.mark.parametrize(['kernel_size', 'stride'], SAME_PADDING_ARGS)
+@th.no_grad()
+def test_unit3d_same_padding(kernel_size, stride):
+    opts = om.Unit3DOptions(in_channels=4, out_channels=8, kernel_size=kernel_size, stride=stride)
+    unit = _randomise_batch_norm(ib.Unit3D(opts)).double().eval()
+    _in = th.randn(2, 4, 8, 15, 15, dtype=th.double)
+
+    assert th.allclose(unit(_in), _reference_unit3d(unit, _in))
+
+
 @pytest.mark.parametrize(['model_spec', 'time_steps'], CLASS_ARGS)
 @th.no_grad()
 def test_class_model(model_spec: str, time_steps: int):
@@ -176,3 +236,90 @@ def test_vae_model(model_spec: str, time_steps: int):
     assert var_inf_class_embed.shape == (BATCH_SIZE, VAE_TEST_NUM_SAMPLES, class_embed_planes)
     assert var_inf_recon.shape == (BATCH_SIZE, VAE_TEST_NUM_SAMPLES, time_steps, C, H, W)
     assert var_inf_vote.shape == (BATCH_SIZE, NUM_CLASSES)
+
+
+@pytest.mark.parametrize(['kernel_size', 'stride'], SAME_PADDING_ARGS)
+@th.no_grad()
+def test_unit3d_fuse_bn(kernel_size, stride):
+    opts = om.Unit3DOptions(in_channels=4, out_channels=8, kernel_size=kernel_size, stride=stride)
+    unit = _randomise_batch_norm(ib.Unit3D(opts)).double().eval()
+    _in = th.randn(2, 4, 8, 15, 15, dtype=th.double)
+    expected = _reference_unit3d(unit, _in)
+    ib.fuse_bn(unit)
+
+    assert unit.batch3d is None
+    assert th.allclose(unit(_in), expected)
+
+
+@pytest.mark.parametrize('max_pool', [True, False])
+@th.no_grad()
+def test_mixed_fuse_bn(max_pool: bool):
+    mixed = _randomise_batch_norm(ib.Mixed(16, [8, 8, 16, 4, 8, 8], max_pool=max_pool)).double().eval()
+    _in = th.randn(2, 16, 4, 7, 7, dtype=th.double)
+    expected = _reference_mixed(mixed, _in)
+    ib.fuse_bn(mixed)
+
+    assert th.allclose(mixed(_in), expected)
+
+
+@pytest.mark.parametrize(['max_pool', 'kernel_depth'], [
+    (True, None),
+    (False, None),
+    (True, [3, 3, 3, 3, 3, 3, 3]),
+])
+def test_mixed_fused_heads(max_pool: bool, kernel_depth):
+    mixed = ib.Mixed(16, [8, 8, 16, 4, 8, 8], kernel_depth=kernel_depth, max_pool=max_pool)
+    mixed = _randomise_batch_norm(mixed).double().eval()
+    _in = th.randn(2, 16, 4, 7, 7, dtype=th.double, requires_grad=True)
+
+    assert mixed.fuse_heads == (kernel_depth is None)
+    assert th.allclose(mixed(_in), _reference_mixed(mixed, _in))
+
+    mixed(_in).sum().backward()
+    assert all(param.grad is not None for head in mixed._heads() for param in head.conv3d.parameters())
+
+
+@pytest.mark.parametrize('memory_format', [th.contiguous_format, th.channels_last_3d])
+@pytest.mark.parametrize('max_pool', [True, False])
+@th.no_grad()
+def test_mixed_inference_out(max_pool: bool, memory_format: th.memory_format):
+    mixed = _randomise_batch_norm(ib.Mixed(16, [8, 8, 16, 4, 8, 8], max_pool=max_pool)).double().eval()
+    _in = th.randn(2, 16, 4, 7, 7, dtype=th.double).contiguous(memory_format=memory_format)
+    _out = mixed(_in)
+
+    assert _out.is_contiguous(memory_format=memory_format)
+    assert th.allclose(_out, _reference_mixed(mixed, _in))
+
+
+@pytest.mark.parametrize('activation', ['relu', 'none'])
+@th.no_grad()
+def test_unit3d_post_out(activation: str):
+    opts = om.Unit3DOptions(in_channels=4, out_channels=8, kernel_size=[3, 3, 3], activation=activation)
+    unit = _randomise_batch_norm(ib.Unit3D(opts)).double().eval()
+    _in = th.randn(2, 4, 4, 7, 7, dtype=th.double)
+    out = th.zeros(2, 12, 4, 7, 7, dtype=th.double)
+    unit.post(unit.conv(_in), out=out.narrow(1, 2, 8))
+
+    assert th.allclose(out.narrow(1, 2, 8), _reference_unit3d(unit, _in))
+    assert not out.narrow(1, 0, 2).any() and not out.narrow(1, 10, 2).any()
+
+
+@th.no_grad()
+def test_decoder_inference_quantize():
+    decoder = _randomise_batch_norm(vd.I3DDecoder(16, TIME_STEPS)).eval()
+    reference = copy.deepcopy(decoder).double()
+    _in = th.randn(1, 1, 16, 1, 7, 7)
+    expected = reference(_in.double())
+
+    decoder.inference_quantize()
+    _out = decoder(_in)
+    assert _out.dtype == th.float
+    assert th.allclose(_out.double(), expected, atol=1e-3)
+
+    decoder.inference_quantize()
+    assert len(decoder.quantize_hooks) == 2
+    assert th.equal(decoder(_in), _out)
+
+    decoder.eval()
+    with pytest.raises(RuntimeError):
+        decoder.train()
@@ -0,0 +1,50 @@
+import pathlib as pl
+
+import cv2
+import numpy as np
+import pytest
+import skvideo
+import skvideo.io
+
+import prepro.common._augment_meta as am
+
+NUM_FRAMES = 7
+
+
+def test_count_frames_uses_nb_frames(monkeypatch):
+    def check_output(*args, **kwargs):
+        raise AssertionError('ffprobe should not count frames when the container reports nb_frames.')
+
+    monkeypatch.setattr(am.subprocess, 'check_output', check_output)
+
+    assert am._count_frames(pl.Path('video.webm'), {'@nb_frames': '42'}) == 42
+
+
+def test_count_frames_falls_back_to_counting(monkeypatch):
+    calls = []
+
+    def check_output(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return b'42\n'
+
+    monkeypatch.setattr(am.subprocess, 'check_output', check_output)
+
+    assert am._count_frames(pl.Path('/data/video.webm'), {'@height': '240'}) == 42
+    assert len(calls) == 1
+    assert calls[0][0].endswith('ffprobe') and '-count_frames' in calls[0] and calls[0][-1] == '/data/video.webm'
+
+
+@pytest.mark.skipif(not skvideo.getFFmpegPath(), reason='ffmpeg is not installed.')
+def test_count_frames_matches_vread(tmp_path: pl.Path):
+    video_path = tmp_path / 'video.avi'
+    writer = cv2.VideoWriter(video_path.as_posix(), cv2.VideoWriter_fourcc(*'MJPG'), 12, (32, 24))
+    for i in range(NUM_FRAMES):
+        writer.write(np.full((24, 32, 3), i * 30, dtype=np.uint8))
+    writer.release()
+
+    video_meta = skvideo.io.ffprobe(video_path.as_posix())['video']
+    length = len(skvideo.io.vread(video_path.as_posix()))
+    counted_meta = {key: value for key, value in video_meta.items() if key != '@nb_frames'}
+
+    assert am._count_frames(video_path, video_meta) == length == NUM_FRAMES
+    assert am._count_frames(video_path, counted_meta) == length